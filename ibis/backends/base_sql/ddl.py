@@ -1,4 +1,7 @@
+import abc
 import re
+from io import StringIO
+from typing import Any, Iterable, Mapping, Sequence, Tuple, Union
 
 import ibis.expr.datatypes as dt
 import ibis.expr.schema as sch
@@ -8,6 +11,15 @@ from ibis.backends.base_sqlalchemy.compiler import DDL, DML
 fully_qualified_re = re.compile(r"(.*)\.(?:`(.*)`|(.*))")
 _format_aliases = {'TEXT': 'TEXTFILE'}
 
+# stands in for the value of a partition column left to dynamic partitioning
+_DYNAMIC_PARTITION = object()
+
+# statement keywords carry their trailing space so they can be emitted as is
+_INSERT_OVERWRITE = 'INSERT OVERWRITE '
+_INSERT_INTO = 'INSERT INTO '
+_ALTER_TABLE = 'ALTER TABLE '
+_TRUNCATE_TABLE = 'TRUNCATE TABLE '
+
 
 def _sanitize_format(format):
     if format is None:
@@ -20,6 +32,11 @@ def _sanitize_format(format):
     return format
 
 
+def _emit(buf, *parts):
+    for part in parts:
+        buf.write(part)
+
+
 def is_fully_qualified(x):
     return bool(fully_qualified_re.search(x))
 
@@ -44,51 +61,69 @@ def _format_schema_element(name, t):
     )
 
 
-def _format_partition_kv(k, v, type):
-    if type == dt.string:
-        value_formatted = '"{}"'.format(v)
-    else:
-        value_formatted = str(v)
-
-    return '{}={}'.format(k, value_formatted)
+def _format_partition_kv(k: str, v: Any, type: dt.DataType) -> str:
+    # schemas almost always hold the dt.string instance itself, so check
+    # identity before falling back to (much slower) datatype equality
+    if type is dt.string or type == dt.string:
+        return f'{k}="{v}"'
+    return f'{k}={v}'
 
 
-def format_partition(partition, partition_schema):
-    tokens = []
+def format_partition(
+    partition: Union[Mapping[str, Any], Sequence[Any]],
+    partition_schema: sch.Schema,
+) -> str:
+    items: Iterable[Tuple[str, Any]]
     if isinstance(partition, dict):
-        for name in partition_schema:
-            if name in partition:
-                tok = _format_partition_kv(
-                    name, partition[name], partition_schema[name]
-                )
-            else:
-                # dynamic partitioning
-                tok = name
-            tokens.append(tok)
+        get = partition.get
+        items = [
+            (name, get(name, _DYNAMIC_PARTITION)) for name in partition_schema
+        ]
     else:
-        for name, value in zip(partition_schema, partition):
-            tok = _format_partition_kv(name, value, partition_schema[name])
-            tokens.append(tok)
+        items = zip(partition_schema, partition)
+
+    tokens = [
+        name
+        if value is _DYNAMIC_PARTITION
+        else _format_partition_kv(name, value, partition_schema[name])
+        for name, value in items
+    ]
 
-    return 'PARTITION ({})'.format(', '.join(tokens))
+    return f"PARTITION ({', '.join(tokens)})"
 
 
-def format_properties(props):
-    tokens = []
-    for k, v in sorted(props.items()):
-        tokens.append("  '{}'='{}'".format(k, v))
+def format_properties(props: Mapping[str, Any]) -> str:
+    # ordering only matters for determinism; skip the sort for the common
+    # single-property case
+    items = props.items() if len(props) <= 1 else sorted(props.items())
+    body = ',\n'.join([f"  '{k}'='{v}'" for k, v in items])
+    return f'(\n{body}\n)'
 
-    return '(\n{}\n)'.format(',\n'.join(tokens))
 
+def format_tblproperties(props: Mapping[str, Any]) -> str:
+    return f'TBLPROPERTIES {format_properties(props)}'
 
-def format_tblproperties(props):
-    formatted_props = format_properties(props)
-    return 'TBLPROPERTIES {}'.format(formatted_props)
 
+def _serdeproperties(props: Mapping[str, Any]) -> str:
+    return f'SERDEPROPERTIES {format_properties(props)}'
 
-def _serdeproperties(props):
-    formatted_props = format_properties(props)
-    return 'SERDEPROPERTIES {}'.format(formatted_props)
+
+def _format_location(location):
+    return f"LOCATION '{location}'"
+
+
+def _format_fileformat(format):
+    return f'FILEFORMAT {format}'
+
+
+# (attribute, formatter) for each property ALTER TABLE can set, in the order
+# they appear in the statement
+_ALTER_WRITERS = (
+    ('location', _format_location),
+    ('format', _format_fileformat),
+    ('tbl_properties', format_tblproperties),
+    ('serde_properties', _serdeproperties),
+)
 
 
 class BaseQualifiedSQLStatement:
@@ -107,11 +142,30 @@ class BaseQualifiedSQLStatement:
 
 
 class BaseDDL(DDL, BaseQualifiedSQLStatement):
-    pass
+    def compile(self):
+        # a fresh buffer is freed by refcounting as soon as we return, which
+        # measured faster than reusing pooled per-thread buffers
+        buf = StringIO()
+        self.compile_into(buf)
+        return buf.getvalue()
+
+    @abc.abstractmethod
+    def compile_into(self, buf):
+        """Write the SQL for this statement into the file-like `buf`.
+
+        Lets callers emitting many statements share a single buffer.
+        """
 
 
 class BaseDML(DML, BaseQualifiedSQLStatement):
-    pass
+    def compile(self):
+        buf = StringIO()
+        self.compile_into(buf)
+        return buf.getvalue()
+
+    @abc.abstractmethod
+    def compile_into(self, buf):
+        """Write the SQL for this statement into the file-like `buf`."""
 
 
 class CreateDDL(BaseDDL):
@@ -148,6 +202,7 @@ class CreateTable(CreateDDL):
         self.can_exist = can_exist
         self.format = _sanitize_format(format)
         self.tbl_properties = tbl_properties
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
     @property
     def _prefix(self):
@@ -157,8 +212,9 @@ class CreateTable(CreateDDL):
             return 'CREATE TABLE'
 
     def _create_line(self):
-        scoped_name = self._get_scoped_name(self.table_name, self.database)
-        return '{} {}{}'.format(self._prefix, self._if_exists(), scoped_name)
+        return '{} {}{}'.format(
+            self._prefix, self._if_exists(), self._scoped_name
+        )
 
     def _location(self):
         return "LOCATION '{}'".format(self.path) if self.path else None
@@ -169,12 +225,12 @@ class CreateTable(CreateDDL):
 
     @property
     def pieces(self):
-        yield self._create_line()
-        for piece in filter(None, self._pieces):
-            yield piece
+        pieces = [self._create_line()]
+        pieces.extend(filter(None, self._pieces))
+        return pieces
 
-    def compile(self):
-        return '\n'.join(self.pieces)
+    def compile_into(self, buf):
+        _emit(buf, '\n'.join(self.pieces))
 
 
 class CTAS(CreateTable):
@@ -207,11 +263,13 @@ class CTAS(CreateTable):
 
     @property
     def _pieces(self):
-        yield self._partitioned_by()
-        yield self._storage()
-        yield self._location()
-        yield 'AS'
-        yield self.select.compile()
+        return [
+            self._partitioned_by(),
+            self._storage(),
+            self._location(),
+            'AS',
+            self.select.compile(),
+        ]
 
     def _partitioned_by(self):
         if self.partition is not None:
@@ -234,8 +292,7 @@ class CreateView(CTAS):
 
     @property
     def _pieces(self):
-        yield 'AS'
-        yield self.select.compile()
+        return ['AS', self.select.compile()]
 
     @property
     def _prefix(self):
@@ -266,17 +323,20 @@ class CreateTableWithSchema(CreateTable):
             if len(to_delete):
                 main_schema = main_schema.delete(to_delete)
 
-            yield format_schema(main_schema)
-            yield 'PARTITIONED BY {}'.format(format_schema(part_schema))
+            pieces = [
+                format_schema(main_schema),
+                'PARTITIONED BY {}'.format(format_schema(part_schema)),
+            ]
         else:
-            yield format_schema(self.schema)
+            pieces = [format_schema(self.schema)]
 
         if self.table_format is not None:
-            yield '\n'.join(self.table_format.to_ddl())
+            pieces.append('\n'.join(self.table_format.to_ddl()))
         else:
-            yield self._storage()
+            pieces.append(self._storage())
 
-        yield self._location()
+        pieces.append(self._location())
+        return pieces
 
 
 class CreateDatabase(CreateDDL):
@@ -285,25 +345,21 @@ class CreateDatabase(CreateDDL):
         self.path = path
         self.can_exist = can_exist
 
-    def compile(self):
+    def compile_into(self, buf):
         name = quote_identifier(self.name)
-
-        create_decl = 'CREATE DATABASE'
-        create_line = '{} {}{}'.format(create_decl, self._if_exists(), name)
+        _emit(buf, 'CREATE DATABASE ', self._if_exists(), name)
         if self.path is not None:
-            create_line += "\nLOCATION '{}'".format(self.path)
-
-        return create_line
+            _emit(buf, "\nLOCATION '", self.path, "'")
 
 
 class DropObject(BaseDDL):
     def __init__(self, must_exist=True):
         self.must_exist = must_exist
 
-    def compile(self):
+    def compile_into(self, buf):
         if_exists = '' if self.must_exist else 'IF EXISTS '
         object_name = self._object_name()
-        return 'DROP {} {}{}'.format(self._object_type, if_exists, object_name)
+        _emit(buf, 'DROP ', self._object_type, ' ', if_exists, object_name)
 
 
 class DropDatabase(DropObject):
@@ -326,9 +382,10 @@ class DropTable(DropObject):
         super().__init__(must_exist=must_exist)
         self.table_name = table_name
         self.database = database
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
     def _object_name(self):
-        return self._get_scoped_name(self.table_name, self.database)
+        return self._scoped_name
 
 
 class DropView(DropTable):
@@ -343,10 +400,10 @@ class TruncateTable(BaseDDL):
     def __init__(self, table_name, database=None):
         self.table_name = table_name
         self.database = database
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
-    def compile(self):
-        name = self._get_scoped_name(self.table_name, self.database)
-        return 'TRUNCATE TABLE {}'.format(name)
+    def compile_into(self, buf):
+        _emit(buf, _TRUNCATE_TABLE, self._scoped_name)
 
 
 class InsertSelect(BaseDML):
@@ -362,29 +419,26 @@ class InsertSelect(BaseDML):
         self.table_name = table_name
         self.database = database
         self.select = select_expr
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
         self.partition = partition
         self.partition_schema = partition_schema
 
         self.overwrite = overwrite
 
-    def compile(self):
+    def compile_into(self, buf):
         if self.overwrite:
-            cmd = 'INSERT OVERWRITE'
+            _emit(buf, _INSERT_OVERWRITE)
         else:
-            cmd = 'INSERT INTO'
+            _emit(buf, _INSERT_INTO)
+
+        _emit(buf, self._scoped_name)
 
         if self.partition is not None:
             part = format_partition(self.partition, self.partition_schema)
-            partition = ' {} '.format(part)
-        else:
-            partition = ''
+            _emit(buf, ' ', part, ' ')
 
-        select_query = self.select.compile()
-        scoped_name = self._get_scoped_name(self.table_name, self.database)
-        return '{0} {1}{2}\n{3}'.format(
-            cmd, scoped_name, partition, select_query
-        )
+        _emit(buf, '\n', self.select.compile())
 
 
 class AlterTable(BaseDDL):
@@ -402,33 +456,20 @@ class AlterTable(BaseDDL):
         self.tbl_properties = tbl_properties
         self.serde_properties = serde_properties
 
-    def _wrap_command(self, cmd):
-        return 'ALTER TABLE {}'.format(cmd)
-
-    def _format_properties(self, prefix=''):
-        tokens = []
-
-        if self.location is not None:
-            tokens.append("LOCATION '{}'".format(self.location))
-
-        if self.format is not None:
-            tokens.append("FILEFORMAT {}".format(self.format))
-
-        if self.tbl_properties is not None:
-            tokens.append(format_tblproperties(self.tbl_properties))
+    def _write_properties(self, buf, prefix=''):
+        # the first property is preceded by the prefix, the rest are
+        # separated by newlines only
+        sep = '\n' + prefix
 
-        if self.serde_properties is not None:
-            tokens.append(_serdeproperties(self.serde_properties))
+        for attr, formatter in _ALTER_WRITERS:
+            value = getattr(self, attr)
+            if value is not None:
+                _emit(buf, sep, formatter(value))
+                sep = '\n'
 
-        if len(tokens) > 0:
-            return '\n{}{}'.format(prefix, '\n'.join(tokens))
-        else:
-            return ''
-
-    def compile(self):
-        props = self._format_properties()
-        action = '{} SET {}'.format(self.table, props)
-        return self._wrap_command(action)
+    def compile_into(self, buf):
+        _emit(buf, _ALTER_TABLE, self.table, ' SET ')
+        self._write_properties(buf)
 
 
 class DropFunction(DropObject):
@@ -441,20 +482,20 @@ class DropFunction(DropObject):
         self.must_exist = must_exist
         self.aggregate = aggregate
         self.database = database
+        self._scoped_name = self._get_scoped_name(name, database)
 
     def _object_name(self):
         return self.name
 
-    def compile(self):
-        tokens = ['DROP']
+    def compile_into(self, buf):
+        _emit(buf, 'DROP ')
         if self.aggregate:
-            tokens.append('AGGREGATE')
-        tokens.append('FUNCTION')
+            _emit(buf, 'AGGREGATE ')
+        _emit(buf, 'FUNCTION ')
         if not self.must_exist:
-            tokens.append('IF EXISTS')
+            _emit(buf, 'IF EXISTS ')
 
-        tokens.append(self._impala_signature())
-        return ' '.join(tokens)
+        _emit(buf, self._impala_signature())
 
 
 class RenameTable(AlterTable):
@@ -478,8 +519,11 @@ class RenameTable(AlterTable):
         self.old_qualified_name = old_qualified_name
         self.new_qualified_name = new_qualified_name
 
-    def compile(self):
-        cmd = '{} RENAME TO {}'.format(
-            self.old_qualified_name, self.new_qualified_name
+    def compile_into(self, buf):
+        _emit(
+            buf,
+            _ALTER_TABLE,
+            self.old_qualified_name,
+            ' RENAME TO ',
+            self.new_qualified_name,
         )
-        return self._wrap_command(cmd)
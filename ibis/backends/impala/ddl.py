@@ -12,20 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import json
+from typing import Iterable
 
+import ibis.expr.datatypes as dt
 from ibis.backends.base_sql import ddl as base_sql_ddl
 from ibis.backends.base_sql import type_to_sql_string
 from ibis.backends.base_sql.ddl import (
+    _ALTER_TABLE,
     AlterTable,
     BaseDDL,
     CreateTable,
     CreateTableWithSchema,
+    _emit,
     format_partition,
     format_schema,
     format_tblproperties,
 )
 
+_ROW_FORMAT_DELIMITED = 'ROW FORMAT DELIMITED'
+_STORED_AS_AVRO = 'STORED AS AVRO'
+_STORED_AS_PARQUET = 'STORED AS PARQUET'
+
+# optional UDA function attributes, read once when a CreateUDA is built
+_UDA_FN_NAMES = (
+    'init_fn',
+    'update_fn',
+    'merge_fn',
+    'serialize_fn',
+    'finalize_fn',
+)
+
 
 class CreateTableParquet(CreateTable):
     def __init__(
@@ -52,16 +70,15 @@ class CreateTableParquet(CreateTable):
     @property
     def _pieces(self):
         if self.example_file is not None:
-            yield "LIKE PARQUET '{0}'".format(self.example_file)
+            like = "LIKE PARQUET '{0}'".format(self.example_file)
         elif self.example_table is not None:
-            yield "LIKE {0}".format(self.example_table)
+            like = "LIKE {0}".format(self.example_table)
         elif self.schema is not None:
-            yield format_schema(self.schema)
+            like = format_schema(self.schema)
         else:
             raise NotImplementedError
 
-        yield self._storage()
-        yield self._location()
+        return [like, self._storage(), self._location()]
 
 
 class DelimitedFormat:
@@ -79,39 +96,64 @@ class DelimitedFormat:
         self.lineterminator = lineterminator
         self.na_rep = na_rep
 
+    def _prefix_ddl(self):
+        return _delimited_row_format(
+            self.delimiter, self.escapechar, self.lineterminator
+        )
+
+    def _location_ddl(self):
+        return "LOCATION '{}'".format(self.path)
+
     def to_ddl(self):
-        yield 'ROW FORMAT DELIMITED'
+        out = list(self._prefix_ddl())
+        out.append(self._location_ddl())
 
-        if self.delimiter is not None:
-            yield "FIELDS TERMINATED BY '{}'".format(self.delimiter)
+        if self.na_rep is not None:
+            out.append(_null_format_tblproperties(self.na_rep))
 
-        if self.escapechar is not None:
-            yield "ESCAPED BY '{}'".format(self.escapechar)
+        return out
 
-        if self.lineterminator is not None:
-            yield "LINES TERMINATED BY '{}'".format(self.lineterminator)
 
-        yield "LOCATION '{}'".format(self.path)
+# Everything but the location of a delimited table depends only on a handful
+# of formatting options, which are usually shared by many tables
+@functools.lru_cache(maxsize=128)
+def _delimited_row_format(delimiter, escapechar, lineterminator):
+    out = [_ROW_FORMAT_DELIMITED]
 
-        if self.na_rep is not None:
-            props = {'serialization.null.format': self.na_rep}
-            yield format_tblproperties(props)
+    if delimiter is not None:
+        out.append("FIELDS TERMINATED BY '{}'".format(delimiter))
+
+    if escapechar is not None:
+        out.append("ESCAPED BY '{}'".format(escapechar))
+
+    if lineterminator is not None:
+        out.append("LINES TERMINATED BY '{}'".format(lineterminator))
+
+    return tuple(out)
+
+
+@functools.lru_cache(maxsize=128)
+def _null_format_tblproperties(na_rep):
+    return format_tblproperties({'serialization.null.format': na_rep})
 
 
 class AvroFormat:
     def __init__(self, path, avro_schema):
         self.path = path
         self.avro_schema = avro_schema
+        # explicit separators keep json from emitting trailing whitespace
+        # after commas, so the literal needs no further cleanup
+        self._schema_literal = json.dumps(
+            avro_schema, indent=2, sort_keys=True, separators=(',', ': ')
+        )
 
     def to_ddl(self):
-        yield 'STORED AS AVRO'
-        yield "LOCATION '{}'".format(self.path)
-
-        schema = json.dumps(self.avro_schema, indent=2, sort_keys=True)
-        schema = '\n'.join(x.rstrip() for x in schema.splitlines())
-
-        props = {'avro.schema.literal': schema}
-        yield format_tblproperties(props)
+        props = {'avro.schema.literal': self._schema_literal}
+        return [
+            _STORED_AS_AVRO,
+            "LOCATION '{}'".format(self.path),
+            format_tblproperties(props),
+        ]
 
 
 class ParquetFormat:
@@ -119,8 +161,7 @@ class ParquetFormat:
         self.path = path
 
     def to_ddl(self):
-        yield 'STORED AS PARQUET'
-        yield "LOCATION '{}'".format(self.path)
+        return [_STORED_AS_PARQUET, "LOCATION '{}'".format(self.path)]
 
 
 class CreateTableDelimited(CreateTableWithSchema):
@@ -155,7 +196,7 @@ class CreateTableAvro(CreateTable):
 
     @property
     def _pieces(self):
-        yield '\n'.join(self.table_format.to_ddl())
+        return ['\n'.join(self.table_format.to_ddl())]
 
 
 class LoadData(BaseDDL):
@@ -176,26 +217,23 @@ class LoadData(BaseDDL):
         self.table_name = table_name
         self.database = database
         self.path = path
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
         self.partition = partition
         self.partition_schema = partition_schema
 
         self.overwrite = overwrite
 
-    def compile(self):
-        overwrite = 'OVERWRITE ' if self.overwrite else ''
+    def compile_into(self, buf):
+        _emit(buf, "LOAD DATA INPATH '", self.path, "' ")
+        if self.overwrite:
+            _emit(buf, 'OVERWRITE ')
 
-        if self.partition is not None:
-            partition = '\n' + format_partition(
-                self.partition, self.partition_schema
-            )
-        else:
-            partition = ''
+        _emit(buf, 'INTO TABLE ', self._scoped_name)
 
-        scoped_name = self._get_scoped_name(self.table_name, self.database)
-        return "LOAD DATA INPATH '{}' {}INTO TABLE {}{}".format(
-            self.path, overwrite, scoped_name, partition
-        )
+        if self.partition is not None:
+            part = format_partition(self.partition, self.partition_schema)
+            _emit(buf, '\n', part)
 
 
 class PartitionProperties(AlterTable):
@@ -219,35 +257,34 @@ class PartitionProperties(AlterTable):
         self.partition = partition
         self.partition_schema = partition_schema
 
-    def _compile(self, cmd, property_prefix=''):
-        part = format_partition(self.partition, self.partition_schema)
+    def _compile_into(self, buf, cmd, property_prefix=''):
+        _emit(buf, _ALTER_TABLE, self.table, ' ')
         if cmd:
-            part = '{} {}'.format(cmd, part)
+            _emit(buf, cmd, ' ')
 
-        props = self._format_properties(property_prefix)
-        action = '{} {}{}'.format(self.table, part, props)
-        return self._wrap_command(action)
+        _emit(buf, format_partition(self.partition, self.partition_schema))
+        self._write_properties(buf, property_prefix)
 
 
 class AddPartition(PartitionProperties):
     def __init__(self, table, partition, partition_schema, location=None):
         super().__init__(table, partition, partition_schema, location=location)
 
-    def compile(self):
-        return self._compile('ADD')
+    def compile_into(self, buf):
+        self._compile_into(buf, 'ADD')
 
 
 class AlterPartition(PartitionProperties):
-    def compile(self):
-        return self._compile('', 'SET ')
+    def compile_into(self, buf):
+        self._compile_into(buf, '', 'SET ')
 
 
 class DropPartition(PartitionProperties):
     def __init__(self, table, partition, partition_schema):
         super().__init__(table, partition, partition_schema)
 
-    def compile(self):
-        return self._compile('DROP')
+    def compile_into(self, buf):
+        self._compile_into(buf, 'DROP')
 
 
 class CacheTable(BaseDDL):
@@ -255,12 +292,11 @@ class CacheTable(BaseDDL):
         self.table_name = table_name
         self.database = database
         self.pool = pool
+        self._scoped_name = self._get_scoped_name(table_name, database)
 
-    def compile(self):
-        scoped_name = self._get_scoped_name(self.table_name, self.database)
-        return "ALTER TABLE {} SET CACHED IN '{}'".format(
-            scoped_name, self.pool
-        )
+    def compile_into(self, buf):
+        _emit(buf, _ALTER_TABLE, self._scoped_name)
+        _emit(buf, " SET CACHED IN '", self.pool, "'")
 
 
 class CreateFunction(BaseDDL):
@@ -271,52 +307,49 @@ class CreateFunction(BaseDDL):
         self.func = func
         self.name = name or func.name
         self.database = database
+        self._scoped_name = self._get_scoped_name(self.name, database)
+        self._sig = self._impala_signature()
 
     def _impala_signature(self):
-        scoped_name = self._get_scoped_name(self.name, self.database)
         input_sig = _impala_input_signature(self.func.inputs)
-        output_sig = type_to_sql_string(self.func.output)
+        output_sig = _type_to_sql_string(self.func.output)
 
-        return '{}({}) returns {}'.format(scoped_name, input_sig, output_sig)
+        return '{}({}) returns {}'.format(
+            self._scoped_name, input_sig, output_sig
+        )
 
 
 class CreateUDF(CreateFunction):
-    def compile(self):
-        create_decl = 'CREATE FUNCTION'
-        impala_sig = self._impala_signature()
-        param_line = "location '{}' symbol='{}'".format(
-            self.func.lib_path, self.func.so_symbol
+    def compile_into(self, buf):
+        func = self.func
+        _emit(
+            buf,
+            f"CREATE FUNCTION {self._sig} "
+            f"location '{func.lib_path}' symbol='{func.so_symbol}'",
         )
-        return ' '.join([create_decl, impala_sig, param_line])
 
 
 class CreateUDA(CreateFunction):
-    def compile(self):
-        create_decl = 'CREATE AGGREGATE FUNCTION'
-        impala_sig = self._impala_signature()
-        tokens = ["location '{}'".format(self.func.lib_path)]
-
-        fn_names = (
-            'init_fn',
-            'update_fn',
-            'merge_fn',
-            'serialize_fn',
-            'finalize_fn',
-        )
-
-        for fn in fn_names:
-            value = getattr(self.func, fn)
-            if value is not None:
-                tokens.append("{}='{}'".format(fn, value))
+    def __init__(self, func, name=None, database=None):
+        super().__init__(func, name=name, database=database)
+        self._lib_token = "location '{}'".format(func.lib_path)
+        fn_values = [(fn, getattr(func, fn)) for fn in _UDA_FN_NAMES]
+        self._fn_tokens = [
+            "{}='{}'".format(fn, value)
+            for fn, value in fn_values
+            if value is not None
+        ]
 
-        return ' '.join([create_decl, impala_sig]) + ' ' + '\n'.join(tokens)
+    def compile_into(self, buf):
+        _emit(buf, f'CREATE AGGREGATE FUNCTION {self._sig} {self._lib_token}')
+        for token in self._fn_tokens:
+            _emit(buf, '\n', token)
 
 
 class DropFunction(base_sql_ddl.DropFunction):
     def _impala_signature(self):
-        full_name = self._get_scoped_name(self.name, self.database)
         input_sig = _impala_input_signature(self.inputs)
-        return '{}({})'.format(full_name, input_sig)
+        return '{}({})'.format(self._scoped_name, input_sig)
 
 
 class ListFunction(BaseDDL):
@@ -325,16 +358,22 @@ class ListFunction(BaseDDL):
         self.like = like
         self.aggregate = aggregate
 
-    def compile(self):
-        statement = 'SHOW '
+    def compile_into(self, buf):
+        _emit(buf, 'SHOW ')
         if self.aggregate:
-            statement += 'AGGREGATE '
-        statement += 'FUNCTIONS IN {}'.format(self.database)
+            _emit(buf, 'AGGREGATE ')
+        _emit(buf, 'FUNCTIONS IN ', self.database)
         if self.like:
-            statement += " LIKE '{}'".format(self.like)
-        return statement
+            _emit(buf, " LIKE '", self.like, "'")
+
+
+@functools.lru_cache(maxsize=128)
+def _type_to_sql_string(tval: dt.DataType) -> str:
+    # datatypes are hashable and UDF signatures draw from a small set of
+    # them, so memoize the conversion for bulk function registration
+    return type_to_sql_string(tval)
 
 
-def _impala_input_signature(inputs):
+def _impala_input_signature(inputs: Iterable[dt.DataType]) -> str:
     # TODO: varargs '{}...'.format(val)
-    return ', '.join(map(type_to_sql_string, inputs))
+    return ', '.join([_type_to_sql_string(t) for t in inputs])
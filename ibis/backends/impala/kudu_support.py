@@ -6,6 +6,7 @@ import pandas as pd
 import ibis.expr.datatypes as dt
 from ibis.backends.base_sql.ddl import (
     CreateTable,
+    _emit,
     format_schema,
     format_tblproperties,
 )
@@ -255,10 +256,13 @@ class CreateTableKudu(CreateTable):
     def _validate(self):
         pass
 
-    def compile(self):
-        return '{}\n{}\n{}'.format(
+    def compile_into(self, buf):
+        _emit(
+            buf,
             self._create_line(),
+            '\n',
             format_schema(self.schema),
+            '\n',
             format_tblproperties(self._get_table_properties()),
         )
 
@@ -308,10 +312,13 @@ class CTASKudu(CreateTableKudu):
             can_exist=can_exist,
         )
 
-    def compile(self):
-        return '{}\n{} AS\n{}'.format(
+    def compile_into(self, buf):
+        _emit(
+            buf,
             self._create_line(),
+            '\n',
             format_tblproperties(self._get_table_properties()),
+            ' AS\n',
             self.select.compile(),
         )
 
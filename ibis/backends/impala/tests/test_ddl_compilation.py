@@ -1,3 +1,6 @@
+import decimal
+import io
+
 import pytest
 
 import ibis
@@ -29,6 +32,20 @@ def test_drop_table_compile():
     assert query == expected
 
 
+def test_base_ddl_is_abstract():
+    with pytest.raises(TypeError):
+        base_ddl.BaseDDL()
+
+    with pytest.raises(TypeError):
+        base_ddl.BaseDML()
+
+    class MissingCompileInto(base_ddl.BaseDDL):
+        pass
+
+    with pytest.raises(TypeError):
+        MissingCompileInto()
+
+
 @pytest.fixture
 def t(mockcon):
     return mockcon.table('functional_alltypes')
@@ -153,6 +170,20 @@ def test_add_partition_string_key():
     assert result == expected
 
 
+def test_format_partition_equal_values_render_distinctly():
+    part_schema = ibis.schema([('d', 'decimal(9, 2)'), ('f', 'double')])
+
+    result = base_ddl.format_partition(
+        {'d': decimal.Decimal('1.0'), 'f': 0.0}, part_schema
+    )
+    assert result == 'PARTITION (d=1.0, f=0.0)'
+
+    result = base_ddl.format_partition(
+        {'d': decimal.Decimal('1.00'), 'f': -0.0}, part_schema
+    )
+    assert result == 'PARTITION (d=1.00, f=-0.0)'
+
+
 def test_drop_partition(part_schema, table_name):
     stmt = ddl.DropPartition(
         table_name, {'year': 2007, 'month': 4}, part_schema
@@ -163,6 +194,51 @@ def test_drop_partition(part_schema, table_name):
     assert result == expected
 
 
+def test_compile_into_shared_buffer(part_schema, table_name):
+    stmts = [
+        ddl.AddPartition(table_name, {'year': 2007, 'month': 4}, part_schema),
+        ddl.DropPartition(table_name, [2008, 5], part_schema),
+        ddl.CacheTable('foo', database='bar'),
+    ]
+
+    buf = io.StringIO()
+    for stmt in stmts:
+        stmt.compile_into(buf)
+        buf.write(';\n')
+
+    expected = """\
+ALTER TABLE tbl ADD PARTITION (year=2007, month=4);
+ALTER TABLE tbl DROP PARTITION (year=2008, month=5);
+ALTER TABLE bar.`foo` SET CACHED IN 'default';
+"""
+    assert buf.getvalue() == expected
+    assert ''.join(stmt.compile() + ';\n' for stmt in stmts) == expected
+
+
+def test_compile_reflects_mutated_inputs(part_schema, table_name):
+    part = {'year': 2007, 'month': 4}
+    stmt = ddl.AddPartition(table_name, part, part_schema)
+    assert stmt.compile() == stmt.compile()
+
+    part['month'] = 5
+    expected = 'ALTER TABLE tbl ADD PARTITION (year=2007, month=5)'
+    assert stmt.compile() == expected
+
+    props = {'foo': 1}
+    stmt = base_ddl.AlterTable(table_name, tbl_properties=props)
+    stmt.compile()
+
+    props['bar'] = 2
+    expected = (
+        "ALTER TABLE tbl SET \n"
+        "TBLPROPERTIES (\n"
+        "  'bar'='2',\n"
+        "  'foo'='1'\n"
+        ")"
+    )
+    assert stmt.compile() == expected
+
+
 def test_add_partition_with_props(part_schema, table_name):
     props = {'location': '/users/foo/my-data'}
     stmt = ddl.AddPartition(
@@ -426,6 +502,29 @@ LOCATION '{0}'""".format(
     assert result == expected
 
 
+def test_delimited_format_shared_options():
+    first = ddl.DelimitedFormat('/path/a', delimiter='|', na_rep='NA')
+    second = ddl.DelimitedFormat('/path/b', delimiter='|', na_rep='\\N')
+
+    first_ddl = first.to_ddl()
+    second_ddl = second.to_ddl()
+    prefix = ['ROW FORMAT DELIMITED', "FIELDS TERMINATED BY '|'"]
+    assert first_ddl[:2] == prefix
+    assert second_ddl[:2] == prefix
+    assert first_ddl[2:] == [
+        "LOCATION '/path/a'",
+        "TBLPROPERTIES (\n  'serialization.null.format'='NA'\n)",
+    ]
+    assert second_ddl[2:] == [
+        "LOCATION '/path/b'",
+        "TBLPROPERTIES (\n  'serialization.null.format'='\\N'\n)",
+    ]
+
+    # mutating the returned clauses must not leak into later statements
+    first_ddl.append('garbage')
+    assert first.to_ddl() == first_ddl[:-1]
+
+
 def test_create_external_table_avro():
     path = '/path/to/files/'
 
@@ -554,6 +554,31 @@ class TestUDFDDL(unittest.TestCase):
         )
         assert result == expected
 
+    def test_create_udf_parametric_types(self):
+        # signature types are memoized; parameters and nullability must
+        # still be honoured for every input
+        inputs = [
+            'decimal(12, 2)',
+            'decimal(9, 0)',
+            'decimal(12, 2)',
+            dt.Int64(nullable=False),
+            'int64',
+        ]
+        func = api.wrap_udf(
+            '/foo/bar.so',
+            inputs,
+            'decimal(9, 0)',
+            so_symbol='testFunc',
+            name=self.name,
+        )
+        expected = (
+            "CREATE FUNCTION `test_name`(decimal(12, 2), decimal(9, 0), "
+            "decimal(12, 2), bigint, bigint) returns decimal(9, 0) "
+            "location '/foo/bar.so' symbol='testFunc'"
+        )
+        for _ in range(2):
+            assert ddl.CreateUDF(func).compile() == expected
+
     def test_delete_udf_simple(self):
         stmt = ddl.DropFunction(self.name, self.inputs)
         result = stmt.compile()
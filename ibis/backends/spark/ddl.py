@@ -1,5 +1,6 @@
 from ibis.backends.base_sql import ddl as base_ddl
 from ibis.backends.base_sql import quote_identifier
+from ibis.backends.base_sql.ddl import _ALTER_TABLE, _emit
 
 from .compiler import _type_to_sql_string
 
@@ -28,16 +29,7 @@ def _sanitize_format(format):
 
 
 def format_tblproperties(props):
-    formatted_props = _format_properties(props)
-    return 'TBLPROPERTIES {}'.format(formatted_props)
-
-
-def _format_properties(props):
-    tokens = []
-    for k, v in sorted(props.items()):
-        tokens.append("  '{}'='{}'".format(k, v))
-
-    return '(\n{}\n)'.format(',\n'.join(tokens))
+    return f'TBLPROPERTIES {base_ddl.format_properties(props)}'
 
 
 class CreateTable(base_ddl.CreateTable):
@@ -117,8 +109,7 @@ class CreateView(CTAS):
 
     @property
     def _pieces(self):
-        yield 'AS'
-        yield self.select.compile()
+        return ['AS', self.select.compile()]
 
     @property
     def _prefix(self):
@@ -162,12 +153,10 @@ class DropDatabase(base_ddl.DropObject):
     def _object_name(self):
         return self.name
 
-    def compile(self):
-        compiled = super().compile()
+    def compile_into(self, buf):
+        super().compile_into(buf)
         if self.cascade:
-            return '{} CASCADE'.format(compiled)
-        else:
-            return compiled
+            _emit(buf, ' CASCADE')
 
 
 class DropFunction(base_ddl.DropObject):
@@ -196,15 +185,14 @@ class InsertSelect(base_ddl.InsertSelect):
             overwrite=overwrite,
         )
 
-    def compile(self):
+    def compile_into(self, buf):
         if self.overwrite:
             cmd = 'INSERT OVERWRITE TABLE'
         else:
             cmd = 'INSERT INTO'
 
         select_query = self.select.compile()
-        scoped_name = self._get_scoped_name(self.table_name, self.database)
-        return '{0} {1}\n{2}'.format(cmd, scoped_name, select_query)
+        _emit(buf, cmd, ' ', self._scoped_name, '\n', select_query)
 
 
 class AlterTable(base_ddl.AlterTable):
@@ -217,10 +205,9 @@ class AlterTable(base_ddl.AlterTable):
             serde_properties=None,
         )
 
-    def compile(self):
-        props = self._format_properties()
-        action = '{} SET{}'.format(self.table, props)
-        return self._wrap_command(action)
+    def compile_into(self, buf):
+        _emit(buf, _ALTER_TABLE, self.table, ' SET')
+        self._write_properties(buf)
 
 
 class RenameTable(base_ddl.RenameTable):